@@ -1,8 +1,23 @@
+import csv
+import hashlib
+import os
+import re
+import sys
 import requests
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Optional, Any
+from functools import lru_cache
+from operator import itemgetter
+from typing import Iterable, Iterator, List, Dict, Mapping, Optional, Tuple, Any
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson  # Optional, faster JSON encoding/decoding
+except ImportError:
+    orjson = None
 
 # Configure logging
 logging.basicConfig(
@@ -11,18 +26,40 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Shared HTTP session so requests reuse pooled keep-alive connections
+SESSION = requests.Session()
+SESSION.headers.update({'Accept-Encoding': 'gzip'})
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504])
+))
+
 # Constants
 BASE_URL = 'https://developer.wordpress.org/news'
 POST_TYPES = ['snippets', 'dev-blog-videos', 'posts']
+MAX_PAGE_WORKERS = 4  # Concurrent page requests per post type
+VIEWS_CSV_FILE = 'developer.wordpress.org__news-posts-week-09_30_2024-10_06_2024.csv'
+VIEWS_JSON_FILE = 'views_data.json'
+# Bump when the cached key format changes (e.g. normalize_url output)
+VIEWS_CACHE_VERSION = 1
+CSV_HASH_CHUNK_SIZE = 64 * 1024
+UNSAFE_FILENAME_RE = re.compile(r'[^A-Za-z0-9_-]+')  # Characters stripped from output filenames
+# Numeric formats as (pattern, (year, month, day) group indices), matched with fullmatch
+DATE_PATTERNS = [
+    (re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})'), (1, 2, 3)),  # YYYY-MM-DD
+    (re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})'), (3, 1, 2)),  # MM/DD/YYYY
+    (re.compile(r'(\d{1,2})-(\d{1,2})-(\d{4})'), (3, 2, 1)),  # DD-MM-YYYY
+    (re.compile(r'(\d{4})/(\d{1,2})/(\d{1,2})'), (1, 2, 3))   # YYYY/MM/DD
+]
+DATE_PATH_RE = re.compile(r'/(\d{4})/(\d{1,2})/\d{1,2}(?=/|$)')  # /YYYY/MM/DD URL segment
+# Named-month formats still go through strptime
 DATE_FORMATS = [
-    '%Y-%m-%d',    # YYYY-MM-DD
-    '%m/%d/%Y',    # MM/DD/YYYY
-    '%d-%m-%Y',    # DD-MM-YYYY
-    '%Y/%m/%d',    # YYYY/MM/DD
     '%B %d, %Y',   # Full month name
     '%b %d, %Y'    # Abbreviated month name
 ]
 
+@lru_cache(maxsize=32)
 def parse_date_input(date_str: str) -> datetime:
     """
     Parse user-input date in various common formats.
@@ -36,6 +73,14 @@ def parse_date_input(date_str: str) -> datetime:
     Raises:
         ValueError: If the date string cannot be parsed
     """
+    for pattern, (year, month, day) in DATE_PATTERNS:
+        match = pattern.fullmatch(date_str)
+        if match:
+            try:
+                return datetime(int(match.group(year)), int(match.group(month)), int(match.group(day)))
+            except ValueError:
+                continue
+    
     for fmt in DATE_FORMATS:
         try:
             return datetime.strptime(date_str, fmt)
@@ -44,6 +89,7 @@ def parse_date_input(date_str: str) -> datetime:
     
     raise ValueError(f"Unable to parse date: {date_str}. Please use formats like YYYY-MM-DD or MM/DD/YYYY")
 
+@lru_cache(maxsize=None)
 def normalize_url(url: str) -> str:
     """
     Normalize URL for comparison by handling various date formats.
@@ -58,86 +104,114 @@ def normalize_url(url: str) -> str:
     Returns:
         Normalized URL string
     """
-    url = url.lower().rstrip('/')
-    parts = url.split('/')
-    normalized_parts = []
-    i = 0
-    
-    while i < len(parts):
-        part = parts[i]
-        if part.isdigit() and len(part) == 4:  # Year
-            normalized_parts.append(part)
-            if i + 1 < len(parts) and parts[i + 1].isdigit() and len(parts[i + 1]) <= 2:  # Month
-                normalized_parts.append(parts[i + 1])
-                if i + 2 < len(parts) and parts[i + 2].isdigit() and len(parts[i + 2]) <= 2:  # Day
-                    i += 3
-                else:
-                    i += 2
-                continue
-        normalized_parts.append(part)
-        i += 1
-    
-    return '/'.join(normalized_parts)
+    # Drop the day from /YYYY/MM/DD, keeping /YYYY/MM
+    return DATE_PATH_RE.sub(r'/\1/\2', url.lower().rstrip('/'))
 
-def csv_to_json(csv_content: str) -> Dict[str, Dict[str, Any]]:
+def csv_to_json(csv_lines: Iterable[str]) -> Dict[str, Dict[str, Any]]:
     """
-    Convert CSV content to JSON format with URL as key and views as value.
+    Convert CSV content to JSON format with normalized URL as key and views as value.
     
     Args:
-        csv_content: Raw CSV content string
+        csv_lines: Iterable of raw CSV lines, e.g. an open file
     
     Returns:
-        Dictionary with URLs as keys and post data as values
+        Dictionary with normalized URLs as keys and post data as values
     """
     views_data = {}
     skipped_lines = 0
     processed_lines = 0
     
-    for line in csv_content.strip().split('\n'):
+    for row in csv.reader(csv_lines):
+        if not row:
+            continue
+        
         try:
-            # Handle quoted strings containing commas
-            if line.startswith('"'):
-                # Find the end of the title (next quote followed by comma)
-                title_end = line.find('",', 1)
-                if title_end == -1:
-                    raise ValueError("Malformed CSV line: missing closing quote for title")
-                
-                title = line[1:title_end]  # Remove surrounding quotes
-                remainder = line[title_end + 2:]  # Skip quote and comma
-                
-                # Split the remainder into views and URL
-                views_str, url = remainder.split(',', 1)
-            else:
-                # Simple case without quotes
-                title_part, views_str, url = line.split(',', 2)
-                title = title_part
+            title, views_str, url = row[0], row[1], row[2]
             
-            # Clean up the values
-            url = url.strip().strip('"').rstrip('/')
             views = int(views_str.strip())
             
-            views_data[url] = {
+            # Key by normalized URL (lowercased, no trailing slash or day segment);
+            # keep the first entry when several URLs normalize to the same key
+            views_data.setdefault(normalize_url(url.strip()), {
                 'title': title,
                 'views': views
-            }
+            })
             processed_lines += 1
             
         except (ValueError, IndexError) as e:
             skipped_lines += 1
-            logger.debug(f"Skipped line: {line.strip()}")  # Changed to debug level
+            logger.debug(f"Skipped line: {','.join(row)}")  # Changed to debug level
             continue
     
     logger.info(f"Processed {processed_lines} lines, skipped {skipped_lines} lines")
     return views_data
 
+def load_views_data(csv_path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Load views data from CSV, reusing the cached JSON when the CSV is unchanged.
+    
+    Args:
+        csv_path: Path to the Jetpack views CSV file
+    
+    Returns:
+        Dictionary with normalized URLs as keys and post data as values
+    
+    Raises:
+        FileNotFoundError: If the CSV file does not exist
+    """
+    # Hash in chunks so the CSV is never held in memory as a whole
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(csv_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(CSV_HASH_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    csv_hash = hasher.hexdigest()
+    
+    # The cache records the CSV hash and format version it was built from; anything
+    # else at this path (e.g. the raw-URL file the JS fetcher writes) is a miss
+    if os.path.exists(VIEWS_JSON_FILE):
+        try:
+            with open(VIEWS_JSON_FILE, 'rb') as json_file:
+                json_bytes = json_file.read()
+            cache = orjson.loads(json_bytes) if orjson else json.loads(json_bytes)
+            
+            if (
+                isinstance(cache, dict)
+                and cache.get('version') == VIEWS_CACHE_VERSION
+                and cache.get('csv_hash') == csv_hash
+                and isinstance(cache.get('views'), dict)
+            ):
+                logger.info("Views data unchanged, loaded cached JSON")
+                return cache['views']
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable views cache: {e}")
+    
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as file:
+        views_data = csv_to_json(file)
+    
+    # Save as JSON file for future use
+    cache = {
+        'version': VIEWS_CACHE_VERSION,
+        'csv_hash': csv_hash,
+        'views': views_data
+    }
+    if orjson:
+        json_bytes = orjson.dumps(cache, option=orjson.OPT_INDENT_2)
+    else:
+        json_bytes = json.dumps(cache, indent=2).encode('utf-8')
+    with open(VIEWS_JSON_FILE, 'wb') as json_file:
+        json_file.write(json_bytes)
+    logger.info("Views data loaded and converted to JSON successfully")
+    
+    return views_data
+
 def fetch_wordpress_posts(
     base_url: str,
     post_types: List[str],
     after_date: Optional[datetime] = None,
     page: int = 1,
     per_page: int = 100,
-    views_data: Optional[Dict] = None
-) -> List[Dict]:
+    views_by_norm: Optional[Dict] = None
+) -> Iterator[Dict]:
     """
     Fetch posts from WordPress REST API with type and date filtering.
     
@@ -145,105 +219,117 @@ def fetch_wordpress_posts(
         base_url: Base URL for the WordPress site
         post_types: List of post types to fetch
         after_date: Only fetch posts after this date
-        page: Page number for pagination
+        page: First page to fetch; later pages are fetched until X-WP-TotalPages
         per_page: Number of posts per page
-        views_data: Dictionary containing view counts
+        views_by_norm: Dictionary containing view counts keyed by normalized URL
     
-    Returns:
-        List of formatted post dictionaries
+    Yields:
+        Formatted post dictionaries, one at a time
     """
-    if views_data is None:
-        views_data = {}
-        
-    all_posts = []
-    
-    for post_type in post_types:
-        params = {
-            'page': page,
-            'per_page': per_page,
-            '_embed': 'true'
-        }
-        
-        if after_date:
-            params['after'] = after_date.isoformat()
-            
+    if views_by_norm is None:
+        views_by_norm = {}
+    
+    params = {
+        'page': page,
+        'per_page': per_page,
+        '_embed': 'true'
+    }
+    
+    if after_date:
+        params['after'] = after_date.isoformat()
+    
+    def fetch_page(post_type: str, page_number: int) -> Tuple[List[Dict], Mapping[str, str]]:
         try:
-            response = requests.get(
+            response = SESSION.get(
                 f"{base_url}/wp-json/wp/v2/{post_type}",
-                params=params
+                params={**params, 'page': page_number}
             )
             response.raise_for_status()
-            posts = response.json()
+            return response.json(), response.headers
+        except requests.RequestException as e:
+            logger.error(f"Error fetching {post_type} page {page_number}: {e}")
+            return [], {}
+    
+    def fetch_one_type(post_type: str) -> List[Dict]:
+        posts, headers = fetch_page(post_type, page)
+        
+        try:
+            total_pages = int(headers.get('X-WP-TotalPages', page))
+        except ValueError:
+            logger.warning(f"Invalid X-WP-TotalPages header for {post_type}: {headers['X-WP-TotalPages']!r}")
+            total_pages = page
+        
+        # Fetch any remaining pages concurrently
+        remaining_pages = range(page + 1, total_pages + 1)
+        if remaining_pages:
+            with ThreadPoolExecutor(max_workers=min(len(remaining_pages), MAX_PAGE_WORKERS)) as executor:
+                for page_posts, _ in executor.map(lambda p: fetch_page(post_type, p), remaining_pages):
+                    posts.extend(page_posts)
+        
+        return posts
+    
+    # Post types are independent, so fetch them concurrently
+    with ThreadPoolExecutor(max_workers=max(len(post_types), 1)) as executor:
+        for post_type, posts in zip(post_types, executor.map(fetch_one_type, post_types)):
+            # Type and author repeat across posts, so share one string object each
+            post_type = sys.intern(post_type)
             
             for post in posts:
                 post_url = post['link']
-                normalized_post_url = normalize_url(post_url)
+                entry = views_by_norm.get(normalize_url(post_url))
                 
-                # Find matching URL in views data
-                matched_url = next(
-                    (url for url in views_data.keys() 
-                     if normalize_url(url) == normalized_post_url),
-                    None
-                )
-                
-                all_posts.append({
+                yield {
                     'id': post['id'],
                     'title': post['title']['rendered'],
-                    'publication_date': datetime.fromisoformat(post['date'].replace('Z', '+00:00')).strftime('%Y-%m-%d'),
-                    'author': post.get('_embedded', {}).get('author', [{'name': 'Unknown'}])[0]['name'],
+                    'publication_date': post['date'][:10],  # ISO date prefix, YYYY-MM-DD
+                    'author': sys.intern(post.get('_embedded', {}).get('author', [{'name': 'Unknown'}])[0]['name']),
                     'url': post_url,
                     'type': post_type,
-                    'views': views_data.get(matched_url, {}).get('views', 0)
-                })
-                
-        except requests.RequestException as e:
-            logger.error(f"Error fetching {post_type}: {e}")
-            continue
-    
-    return all_posts
+                    'views': entry['views'] if entry else 0
+                }
 
-def generate_markdown_output(posts: List[Dict], input_date: str) -> str:
+def render_markdown_rows(posts: Iterable[Dict]) -> List[Tuple[str, str]]:
     """
-    Generate a Markdown-formatted string of posts.
+    Render posts to Markdown table rows, sorted by publication date.
     
     Args:
-        posts: List of post dictionaries
-        input_date: Date string used for the header
+        posts: Iterable of post dictionaries, e.g. from fetch_wordpress_posts
     
     Returns:
-        Markdown formatted string
+        List of (publication date, table row) tuples in ascending date order
     """
-    markdown_lines = [
-        "# Dev Blog News",
-        f"## Posts Published After {input_date}",
-        "",
-        "| Date | Title | Author | Type | Views | Post ID |",
-        "|------|-------|--------|------|-------|----------|"
+    rows = [
+        (post['publication_date'], f"| {post['publication_date']} | [{post['title'].replace('|', '&#124;')}]({post['url']}) | {post['author']} | {post['type']} | {post['views']} | {post['id']} |\n")
+        for post in posts
     ]
+    rows.sort(key=itemgetter(0))
+    return rows
+
+def iter_markdown_lines(rows: List[Tuple[str, str]], input_date: str) -> Iterator[str]:
+    """
+    Generate the Markdown report line by line.
     
-    # Sort posts by publication date (ascending)
-    sorted_posts = sorted(posts, key=lambda x: x['publication_date'])
+    Args:
+        rows: Sorted table rows from render_markdown_rows
+        input_date: Date string used for the header
     
-    for post in sorted_posts:
-        safe_title = f"[{post['title'].replace('|', '&#124;')}]({post['url']})"
-        markdown_lines.append(
-            f"| {post['publication_date']} | {safe_title} | {post['author']} | {post['type']} | {post['views']} | {post['id']} |"
-        )
+    Yields:
+        Markdown lines, each ending with a newline
+    """
+    yield "# Dev Blog News\n"
+    yield f"## Posts Published After {input_date}\n"
+    yield "\n"
+    yield "| Date | Title | Author | Type | Views | Post ID |\n"
+    yield "|------|-------|--------|------|-------|----------|\n"
     
-    return "\n".join(markdown_lines)
+    for _, line in rows:
+        yield line
 
 def main():
     """Main execution function."""
     # Load views data from CSV
     try:
-        with open('developer.wordpress.org__news-posts-week-09_30_2024-10_06_2024.csv', 'r') as file:
-            views_data = csv_to_json(file.read())
-            
-            # Save as JSON file for future use
-            with open('views_data.json', 'w') as json_file:
-                json.dump(views_data, json_file, indent=2)
-            logger.info("Views data loaded and converted to JSON successfully")
-            
+        views_data = load_views_data(VIEWS_CSV_FILE)
     except FileNotFoundError:
         views_data = {}
         logger.warning("Views data file not found")
@@ -269,20 +355,22 @@ def main():
         base_url=BASE_URL,
         post_types=POST_TYPES,
         after_date=after_date,
-        views_data=views_data
+        views_by_norm=views_data
     )
     
+    # Render rows as posts arrive so only the row strings are kept
+    rows = render_markdown_rows(posts)
+    
     # Generate output
-    if posts:
-        markdown_content = generate_markdown_output(posts, date_input)
-        safe_filename = ''.join(c if c.isalnum() or c in ['-', '_'] else '' for c in f"devblognews-{date_input}")
+    if rows:
+        safe_filename = UNSAFE_FILENAME_RE.sub('', f"devblognews-{date_input}")
         output_filename = f"{safe_filename}.md"
         
         try:
             with open(output_filename, 'w', encoding='utf-8') as f:
-                f.write(markdown_content)
+                f.writelines(iter_markdown_lines(rows, date_input))
             
-            logger.info(f"\nFound {len(posts)} posts published after {date_input if date_input != 'all' else 'any date'}.")
+            logger.info(f"\nFound {len(rows)} posts published after {date_input if date_input != 'all' else 'any date'}.")
             logger.info(f"Markdown output saved to: {output_filename}")
         
         except IOError as e: